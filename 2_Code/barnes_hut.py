@@ -0,0 +1,173 @@
+import numpy as np
+from numerical_methods import G, njit, calculate_gravitational_acceleration
+
+# 天体数少于该值时树结构的常数开销大于收益，直接使用O(N²)算法
+BARNES_HUT_MIN_BODIES = 64
+# 八叉树最大深度，超过后重合（或极近）的天体合并在同一叶节点中
+MAX_DEPTH = 64
+
+@njit(cache=True)
+def _build_octree(pos, Gm, center0, half0, capacity, max_depth):
+    """
+    逐个插入天体构建八叉树，同时累积每个节点的 G·m 与质心
+    （质心以 G·m 加权与以质量加权结果相同）
+    node_body: -1 空叶节点, -2 内部节点, >=0 叶节点中天体的下标
+    节点数超出 capacity 时返回的 n_nodes 为 -1，由调用者扩容重建
+    """
+    children = np.full((capacity, 8), -1, dtype=np.int64)
+    node_body = np.full(capacity, -1, dtype=np.int64)
+    center = np.zeros((capacity, 3))
+    half = np.zeros(capacity)
+    node_Gm = np.zeros(capacity)
+    com = np.zeros((capacity, 3))
+
+    center[0] = center0
+    half[0] = half0
+    n_nodes = 1
+
+    for p in range(pos.shape[0]):
+        node = 0
+        depth = 0
+        while True:
+            # 沿插入路径累积 G·m 和 G·m 加权位置
+            node_Gm[node] += Gm[p]
+            for k in range(3):
+                com[node, k] += Gm[p] * pos[p, k]
+
+            b = node_body[node]
+            if b == -1:
+                node_body[node] = p
+                break
+            if b >= 0:
+                if depth >= max_depth:
+                    break
+                # 叶节点分裂：把原有天体下移到对应的子节点
+                if n_nodes >= capacity:
+                    return children, node_body, center, half, node_Gm, com, -1
+                octant = 0
+                for k in range(3):
+                    if pos[b, k] > center[node, k]:
+                        octant |= 1 << k
+                child = n_nodes
+                n_nodes += 1
+                half[child] = 0.5 * half[node]
+                for k in range(3):
+                    sign = 1.0 if (octant >> k) & 1 else -1.0
+                    center[child, k] = center[node, k] + sign * half[child]
+                    com[child, k] = Gm[b] * pos[b, k]
+                node_body[child] = b
+                node_Gm[child] = Gm[b]
+                children[node, octant] = child
+                node_body[node] = -2
+
+            # 内部节点：进入新天体所在的子节点
+            octant = 0
+            for k in range(3):
+                if pos[p, k] > center[node, k]:
+                    octant |= 1 << k
+            child = children[node, octant]
+            if child == -1:
+                if n_nodes >= capacity:
+                    return children, node_body, center, half, node_Gm, com, -1
+                child = n_nodes
+                n_nodes += 1
+                half[child] = 0.5 * half[node]
+                for k in range(3):
+                    sign = 1.0 if (octant >> k) & 1 else -1.0
+                    center[child, k] = center[node, k] + sign * half[child]
+                children[node, octant] = child
+            node = child
+            depth += 1
+
+    # 加权位置之和转换为质心
+    for node in range(n_nodes):
+        if node_Gm[node] > 0:
+            for k in range(3):
+                com[node, k] /= node_Gm[node]
+
+    return children, node_body, center, half, node_Gm, com, n_nodes
+
+@njit(cache=True, fastmath=True)
+def _tree_acc(pos, children, node_body, half, node_Gm, com, theta, eps2, max_depth, out):
+    """
+    遍历八叉树计算每个天体的加速度
+    节点尺寸 s 与距离 d 满足 s < θ·d 时用节点质心近似整个节点
+    """
+    stack = np.empty(8 * (max_depth + 2), dtype=np.int64)
+    theta2 = theta * theta
+
+    for i in range(pos.shape[0]):
+        ax = 0.0
+        ay = 0.0
+        az = 0.0
+        stack[0] = 0
+        top = 1
+        while top > 0:
+            top -= 1
+            node = stack[top]
+            if node_Gm[node] == 0.0:
+                continue
+
+            dx = com[node, 0] - pos[i, 0]
+            dy = com[node, 1] - pos[i, 1]
+            dz = com[node, 2] - pos[i, 2]
+            d2 = dx*dx + dy*dy + dz*dz
+            b = node_body[node]
+            s = 2.0 * half[node]
+
+            if b >= 0 or s * s < theta2 * d2:
+                # 叶节点或满足开角判据的远处节点：质点-节点相互作用
+                if b == i or d2 == 0.0:
+                    continue
+                inv_r3 = (d2 + eps2) ** -1.5
+                f = node_Gm[node] * inv_r3
+                ax += f * dx
+                ay += f * dy
+                az += f * dz
+            else:
+                for c in range(8):
+                    child = children[node, c]
+                    if child != -1:
+                        stack[top] = child
+                        top += 1
+
+        out[i, 0] = ax
+        out[i, 1] = ay
+        out[i, 2] = az
+    return out
+
+def barnes_hut_force(positions, masses, theta=0.5, eps2=0.0):
+    """
+    Barnes-Hut树算法计算万有引力加速度，复杂度 O(N log N)
+    positions: 位置数组，形状 (N, 3) (m)
+    masses: 质量数组，形状 (N,) (kg)
+    theta: 开角参数，越小越精确（theta=0 退化为直接求和）
+    eps2: 软化长度的平方 (m²)
+    天体数少于 BARNES_HUT_MIN_BODIES 时直接使用 O(N²) 算法
+    可通过 functools.partial 绑定 theta 后作为 VerletIntegrator 的 force_function
+    """
+    positions = np.asarray(positions, dtype=float)
+    masses = np.asarray(masses, dtype=float)
+    Gm = G * masses
+    n_bodies = len(positions)
+
+    if n_bodies < BARNES_HUT_MIN_BODIES:
+        return calculate_gravitational_acceleration(positions, masses, eps2)
+
+    # 根节点取包围全部天体的立方体
+    lower = positions.min(axis=0)
+    upper = positions.max(axis=0)
+    center0 = 0.5 * (lower + upper)
+    half0 = 0.5 * np.max(upper - lower) * (1 + 1e-9) + 1e-300
+
+    capacity = 4 * n_bodies + 16
+    while True:
+        children, node_body, center, half, node_Gm, com, n_nodes = _build_octree(
+            positions, Gm, center0, half0, capacity, MAX_DEPTH)
+        if n_nodes >= 0:
+            break
+        capacity *= 2
+
+    out = np.empty_like(positions)
+    return _tree_acc(positions, children, node_body, half, node_Gm, com,
+                     theta, eps2, MAX_DEPTH, out)
@@ -0,0 +1,7 @@
+# 物理常数定义（不依赖numpy/numba，供各模块共享）
+G = 6.67430e-11  # 万有引力常数 (N·m²/kg²)
+MSUN = 1.989e30  # 太阳质量 (kg)
+EARTH_MASS = 5.972e24  # 地球质量 (kg)
+MOON_MASS = 7.348e22  # 月球质量 (kg)
+AU = 1.496e11  # 天文单位 (m)
+DAY = 86400  # 1天的秒数 (s)
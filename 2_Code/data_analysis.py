@@ -1,37 +1,46 @@
+import math
 import numpy as np
+from numerical_methods import G
+
+def _norm3(vec):
+    """三维向量的模长，比 np.linalg.norm 少了通用分派的开销"""
+    x, y, z = float(vec[0]), float(vec[1]), float(vec[2])
+    return math.sqrt(x*x + y*y + z*z)
 
 def calculate_total_energy(positions, velocities, masses):
-    """计算系统总能量（动能+势能）"""
-    # 动能
-    kinetic_energy = 0.5 * np.sum([m * np.linalg.norm(v)**2 for m, v in zip(masses, velocities)])
+    """计算系统总能量（动能+势能），全部为向量化运算"""
+    positions = np.asarray(positions, dtype=float)
+    velocities = np.asarray(velocities, dtype=float)
+    masses = np.asarray(masses, dtype=float)
     
-    # 势能
-    potential_energy = 0
-    n_bodies = len(positions)
+    # 动能
+    kinetic_energy = 0.5 * (masses * (velocities**2).sum(1)).sum()
     
-    for i in range(n_bodies):
-        for j in range(i+1, n_bodies):
-            r_ij = np.linalg.norm(positions[i] - positions[j])
-            potential_energy -= 6.67430e-11 * masses[i] * masses[j] / r_ij
+    # 势能（只取上三角，每对天体计算一次）
+    i, j = np.triu_indices(len(masses), k=1)
+    diff = positions[i] - positions[j]
+    r = np.sqrt((diff * diff).sum(-1))
+    potential_energy = -G * (masses[i] * masses[j] / r).sum()
     
     return kinetic_energy + potential_energy
 
 def calculate_orbit_elements(position, velocity, mass_primary):
     """计算轨道六要素（以主天体为中心）"""
-    r = np.linalg.norm(position)
-    v = np.linalg.norm(velocity)
+    mu = G * mass_primary  # 引力参数
+    r = _norm3(position)
+    v = _norm3(velocity)
     
     # 计算轨道能量和半长轴
-    energy = 0.5 * v**2 - 6.67430e-11 * mass_primary / r
-    a = -6.67430e-11 * mass_primary / (2 * energy) if energy < 0 else np.inf  # 椭圆轨道
+    energy = 0.5 * v**2 - mu / r
+    a = -mu / (2 * energy) if energy < 0 else np.inf  # 椭圆轨道
     
     # 计算轨道角动量
     h = np.cross(position, velocity)
-    h_norm = np.linalg.norm(h)
+    h_norm = _norm3(h)
     
     # 计算偏心率向量
-    e_vector = (1/(6.67430e-11 * mass_primary)) * ((v**2 - 6.67430e-11 * mass_primary / r) * position - np.dot(position, velocity) * velocity)
-    e = np.linalg.norm(e_vector)
+    e_vector = (1/mu) * ((v**2 - mu / r) * position - np.dot(position, velocity) * velocity)
+    e = _norm3(e_vector)
     
     # 计算倾角
     z_axis = np.array([0, 0, 1])
@@ -39,7 +48,7 @@ def calculate_orbit_elements(position, velocity, mass_primary):
     
     # 计算升交点赤经
     n_vector = np.cross(z_axis, h)
-    n_norm = np.linalg.norm(n_vector)
+    n_norm = _norm3(n_vector)
     Omega = np.arccos(n_vector[0] / n_norm) if n_norm > 0 else 0
     if n_vector[1] < 0:
         Omega = 2 * np.pi - Omega
@@ -62,15 +71,21 @@ def calculate_orbit_elements(position, velocity, mass_primary):
 
 def calculate_lyapunov_exponent(trajectory1, trajectory2, time_step):
     """计算李雅普诺夫指数"""
-    distances = [np.linalg.norm(traj1[1] - traj2[1]) for traj1, traj2 in zip(trajectory1, trajectory2)]
+    trajectory1 = np.asarray(trajectory1)
+    trajectory2 = np.asarray(trajectory2)
+    
+    # 地球位置差的模长，一次向量化计算
+    distances = np.linalg.norm(trajectory1[:, 1, :] - trajectory2[:, 1, :], axis=1)
     initial_distance = distances[0]
     
     # 对数距离
-    log_distances = [np.log(dist / initial_distance) for dist in distances]
-    times = [i * time_step / 86400 for i in range(len(distances))]  # 转换为天
+    log_distances = np.log(distances / initial_distance)
+    times = np.arange(len(distances)) * time_step / 86400  # 转换为天
     
-    # 线性拟合（前半段数据）
+    # 线性拟合（前半段数据），一元最小二乘斜率的闭式解
     valid_indices = int(len(times) * 0.5)
-    slope, _ = np.polyfit(times[:valid_indices], log_distances[:valid_indices], 1)
+    t_fit = times[:valid_indices] - times[:valid_indices].mean()
+    y_fit = log_distances[:valid_indices] - log_distances[:valid_indices].mean()
+    slope = float(np.dot(t_fit, y_fit) / np.dot(t_fit, t_fit))
     
     return slope, times, log_distances
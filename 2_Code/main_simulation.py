@@ -1,35 +1,58 @@
 from numerical_methods import VerletIntegrator, setup_solar_system_initial_conditions, calculate_gravitational_acceleration
+from barnes_hut import barnes_hut_force
 from data_analysis import calculate_total_energy, calculate_orbit_elements, calculate_lyapunov_exponent
-from visualization import plot_orbits, plot_energy_conservation, plot_orbit_elements, generate_animation
 from utils import create_results_directory, timer_decorator
 import numpy as np
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
 
 @timer_decorator
-def run_simulation(perturbation=0.0, days=1000, time_step=12*3600):
-    """运行三体系统模拟"""
-    print(f"运行模拟 (扰动: {perturbation}%, 时长: {days}天)...")
+def run_simulation(perturbation=0.0, days=1000, time_step=12*3600, verbose=False,
+                   method='direct', theta=0.5):
+    """
+    运行三体系统模拟，verbose为True时输出进度（总计最多约20次）
+    method: 力的计算方法，'direct' 为O(N²)直接求和，'barnes_hut' 为树算法
+    theta: Barnes-Hut 开角参数
+    """
+    if verbose:
+        print(f"运行模拟 (扰动: {perturbation}%, 时长: {days}天)...")
     
     # 设置初始条件
     masses, positions, velocities = setup_solar_system_initial_conditions(perturbation)
     
+    steps = int(days * 86400 / time_step)
+    
+    if method == 'direct':
+        force_function = calculate_gravitational_acceleration
+    elif method == 'barnes_hut':
+        force_function = partial(barnes_hut_force, theta=theta)
+    else:
+        raise ValueError(f"未知的力计算方法: {method}")
+    
     # 初始化积分器
     integrator = VerletIntegrator(
         masses=masses,
         initial_positions=positions,
         initial_velocities=velocities,
         time_step=time_step,
-        force_function=calculate_gravitational_acceleration
+        force_function=force_function,
+        max_steps=steps
     )
     
-    # 运行模拟
-    steps = int(days * 86400 / time_step)
+    # 运行模拟（能量只按间隔采样，总计约1000个采样点）
+    energy_sample_interval = max(1, steps // 1000)
     energies = [calculate_total_energy(positions, velocities, masses)]
+    energy_times = [0.0]
     orbit_elements = []
+    log_interval = max(1, steps // 20)
     
     for i in range(steps):
-        if i % 1000 == 0:
+        if verbose and i % log_interval == 0:
             print(f"模拟进度: {i/steps*100:.1f}%")
-            
+        
+        if i % 1000 == 0:
             # 计算当前轨道要素
             earth_pos = positions[1] - positions[0]  # 相对太阳的位置
             earth_vel = velocities[1]
@@ -48,23 +71,36 @@ def run_simulation(perturbation=0.0, days=1000, time_step=12*3600):
         # 执行一步积分
         integrator.step()
         
-        # 计算并记录能量
-        current_energy = calculate_total_energy(
-            integrator.positions, 
-            integrator.velocities, 
-            integrator.masses
-        )
-        energies.append(current_energy)
-    
-    print("模拟完成!")
+        # 按采样间隔计算并记录能量
+        if (i + 1) % energy_sample_interval == 0:
+            current_energy = calculate_total_energy(
+                integrator.positions, 
+                integrator.velocities, 
+                integrator.masses
+            )
+            energies.append(current_energy)
+            energy_times.append((i + 1) * time_step / 86400)  # 转换为天
+    
+    if verbose:
+        print("模拟完成!")
     
     return {
         'trajectories': integrator.trajectories,
         'energies': energies,
+        'energy_times': energy_times,
         'orbit_elements': orbit_elements,
         'masses': masses
     }
 
+def run_simulation_timed(**kwargs):
+    """
+    在子进程中运行模拟（不经过计时装饰器的输出），返回 (结果, 运行时间)
+    运行时间由主进程统一打印，避免多个子进程的输出交错
+    """
+    start_time = time.time()
+    result = run_simulation.__wrapped__(**kwargs)
+    return result, time.time() - start_time
+
 def compare_simulations(standard_results, perturbed_results, time_step):
     """比较标准模拟和扰动模拟的结果"""
     print("分析李雅普诺夫指数...")
@@ -81,6 +117,10 @@ def compare_simulations(standard_results, perturbed_results, time_step):
 
 def main():
     """主函数：运行模拟并生成结果"""
+    parser = argparse.ArgumentParser(description="日-地-月三体系统模拟")
+    parser.add_argument('--no-plot', action='store_true', help="只运行模拟与分析，不生成图像和动画")
+    args = parser.parse_args()
+    
     # 创建结果目录
     create_results_directory()
     
@@ -88,19 +128,24 @@ def main():
     time_step = 12 * 3600  # 12小时
     simulation_days = 1000  # 模拟1000天
     
-    # 运行标准模拟（无扰动）
-    standard_results = run_simulation(
-        perturbation=0.0,
-        days=simulation_days,
-        time_step=time_step
-    )
-    
-    # 运行扰动模拟（0.05%速度扰动）
-    perturbed_results = run_simulation(
-        perturbation=0.05,
-        days=simulation_days,
-        time_step=time_step
-    )
+    # 标准模拟（无扰动）与扰动模拟（0.05%速度扰动）相互独立，在两个进程中并行运行
+    # 子进程不输出，进度与运行时间由主进程统一打印，避免两路输出交错
+    simulations = {'standard': ("标准模拟", 0.0), 'perturbed': ("扰动模拟", 0.05)}
+    results = {}
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        futures = {}
+        for key, (label, perturbation) in simulations.items():
+            print(f"运行{label} (扰动: {perturbation}%, 时长: {simulation_days}天)...")
+            future = executor.submit(run_simulation_timed, perturbation=perturbation,
+                                     days=simulation_days, time_step=time_step)
+            futures[future] = key
+        
+        for n_done, future in enumerate(as_completed(futures), start=1):
+            key = futures[future]
+            results[key], elapsed = future.result()
+            print(f"{simulations[key][0]}完成 ({n_done}/{len(futures)})，运行时间: {elapsed:.2f} 秒")
+    standard_results = results['standard']
+    perturbed_results = results['perturbed']
     
     # 比较两个模拟结果
     lyapunov, times, log_distances = compare_simulations(
@@ -109,6 +154,13 @@ def main():
         time_step
     )
     
+    if args.no_plot:
+        print("已跳过可视化 (--no-plot)")
+        return
+    
+    # 可视化模块依赖matplotlib，仅在需要绘图时导入
+    from visualization import plot_orbits, plot_energy_conservation, plot_orbit_elements, generate_animation
+    
     # 生成可视化结果
     print("生成可视化结果...")
     
@@ -130,7 +182,8 @@ def main():
         standard_results['energies'],
         standard_results['energies'][0],
         title="标准模拟能量守恒",
-        save_path="standard_energy.png"
+        save_path="standard_energy.png",
+        times=standard_results['energy_times']
     )
     
     # 绘制轨道要素演化图
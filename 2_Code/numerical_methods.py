@@ -1,18 +1,30 @@
 import numpy as np
+from constants import G, MSUN, EARTH_MASS, MOON_MASS, AU, DAY  # 物理常数定义见 constants.py
 
-# 物理常数定义
-G = 6.67430e-11  # 万有引力常数 (N·m²/kg²)
-MSUN = 1.989e30  # 太阳质量 (kg)
-EARTH_MASS = 5.972e24  # 地球质量 (kg)
-MOON_MASS = 7.348e22  # 月球质量 (kg)
-AU = 1.496e11  # 天文单位 (m)
-DAY = 86400  # 1天的秒数 (s)
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:  # 未安装numba时退回NumPy向量化实现
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        """numba缺失时的占位装饰器，原样返回函数"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+    
+    prange = range
+
+# 天体数不少于该值时使用分块并行的力计算内核
+TILED_MIN_BODIES = 256
+# 无numba时，天体数不少于该值改用 scipy pdist 计算两两距离
+PDIST_MIN_BODIES = 32
 
 class VerletIntegrator:
     """通用速度Verlet积分器，适用于任何N体系统"""
     
     def __init__(self, masses, initial_positions, initial_velocities, 
-                 time_step, force_function):
+                 time_step, force_function, max_steps=None):
         """
         初始化Verlet积分器
         masses: 天体质量数组 [m1, m2, ...] (kg)
@@ -20,45 +32,267 @@ class VerletIntegrator:
         initial_velocities: 初始速度数组 [v1, v2, ...] (m/s)
         time_step: 时间步长 (s)
         force_function: 计算力的函数，应接受位置数组并返回加速度数组
+        max_steps: 预计的最大步数，用于预分配轨迹数组；为None时按需倍增扩容
         """
         self.masses = np.array(masses, dtype=float)
         self.positions = np.array(initial_positions, dtype=float)
         self.velocities = np.array(initial_velocities, dtype=float)
         self.time_step = time_step
         self.force_function = force_function
+        self.Gm = G * self.masses  # 质量不变，G·m 只需计算一次
         self.accelerations = self.force_function(self.positions, self.masses)
-        self.trajectories = [self.positions.copy()]
+        # 默认直接求和力函数且有numba时，使用融合的JIT单步内核：
+        # 三体系统使用完全展开的专用内核，较大N交给分块并行的力计算内核
+        self._step_kernel = None
+        if NUMBA_AVAILABLE and force_function is calculate_gravitational_acceleration:
+            n_bodies = len(self.masses)
+            if n_bodies == 3:
+                self._step_kernel = _verlet_step_3body
+            elif n_bodies < TILED_MIN_BODIES:
+                self._step_kernel = _verlet_step
+        
+        # 轨迹预分配为 (步数+1, N, 3) 的连续数组，按下标写入
+        capacity = (max_steps if max_steps is not None else 1024) + 1
+        self._trajectory_buffer = np.empty((capacity,) + self.positions.shape)
+        self._trajectory_buffer[0] = self.positions
+        self.step_idx = 0
         self.time = 0
     
+    @property
+    def trajectories(self):
+        """已记录的轨迹，形状 (步数+1, N, 3)，为内部缓冲区的视图"""
+        return self._trajectory_buffer[:self.step_idx + 1]
+    
     def step(self):
-        """执行一个时间步的Verlet算法"""
-        # 位置预测
-        new_positions = self.positions + self.velocities * self.time_step + 0.5 * self.accelerations * self.time_step**2
+        """执行一个时间步的速度Verlet算法（每步仅一次力计算）"""
+        dt = self.time_step
         
-        # 计算新加速度
-        self.positions = new_positions
-        new_accelerations = self.force_function(self.positions, self.masses)
+        if self._step_kernel is not None:
+            # 位置、加速度、速度在同一内核中原地更新，无临时数组
+            self._step_kernel(self.positions, self.velocities, self.accelerations,
+                              self.Gm, dt, 0.0)
+        else:
+            a_old = self.accelerations
+            
+            # 位置更新（原地）
+            self.positions += self.velocities * dt + 0.5 * a_old * dt**2
+            
+            # 在新位置计算一次加速度
+            a_new = self.force_function(self.positions, self.masses)
+            
+            # 速度校正：使用新旧加速度的平均
+            self.velocities += 0.5 * (a_old + a_new) * dt
+            self.accelerations = a_new
         
-        # 速度校正
-        self.velocities += 0.5 * (self.accelerations + new_accelerations) * self.time_step
-        self.accelerations = new_accelerations
-        
-        # 保存轨迹
-        self.trajectories.append(self.positions.copy())
-        self.time += self.time_step
+        # 保存轨迹（缓冲区不足时倍增扩容）
+        self.step_idx += 1
+        if self.step_idx >= len(self._trajectory_buffer):
+            grown = np.empty((2 * len(self._trajectory_buffer),) + self.positions.shape)
+            grown[:self.step_idx] = self._trajectory_buffer
+            self._trajectory_buffer = grown
+        self._trajectory_buffer[self.step_idx] = self.positions
+        self.time += dt
+
+@njit(cache=True, fastmath=True)
+def _grav_acc(pos, Gm, eps2, out):
+    """
+    万有引力加速度的JIT内核，利用牛顿第三定律每对天体只计算一次
+    Gm: 预先计算的 G·m 数组 (N,)
+    结果写入预分配的 out 数组 (N, 3)
+    """
+    n = pos.shape[0]
+    for i in range(n):
+        out[i, 0] = 0.0
+        out[i, 1] = 0.0
+        out[i, 2] = 0.0
+    
+    for i in range(n):
+        for j in range(i + 1, n):
+            dx = pos[j, 0] - pos[i, 0]
+            dy = pos[j, 1] - pos[i, 1]
+            dz = pos[j, 2] - pos[i, 2]
+            r2 = dx*dx + dy*dy + dz*dz + eps2
+            inv_r3 = r2 ** -1.5
+            fi = Gm[j] * inv_r3
+            fj = Gm[i] * inv_r3
+            out[i, 0] += fi * dx
+            out[i, 1] += fi * dy
+            out[i, 2] += fi * dz
+            out[j, 0] -= fj * dx
+            out[j, 1] -= fj * dy
+            out[j, 2] -= fj * dz
+    return out
+
+@njit(cache=True, fastmath=True, parallel=True)
+def _grav_acc_tiled(pos, Gm, eps2, out, block_size):
+    """
+    分块并行的万有引力加速度内核，适用于较大的N
+    外层按 block_size 个天体分块并行，内层按块遍历 j，使工作集留在L1缓存中
+    各块只写自己的加速度，因此不利用牛顿第三定律以避免写冲突
+    """
+    n = pos.shape[0]
+    n_tiles = (n + block_size - 1) // block_size
+    for t in prange(n_tiles):
+        i0 = t * block_size
+        i1 = min(i0 + block_size, n)
+        tile_acc = np.zeros((block_size, 3))
+        for j0 in range(0, n, block_size):
+            j1 = min(j0 + block_size, n)
+            for i in range(i0, i1):
+                xi = pos[i, 0]
+                yi = pos[i, 1]
+                zi = pos[i, 2]
+                ax = 0.0
+                ay = 0.0
+                az = 0.0
+                for j in range(j0, j1):
+                    if j == i:
+                        continue
+                    dx = pos[j, 0] - xi
+                    dy = pos[j, 1] - yi
+                    dz = pos[j, 2] - zi
+                    r2 = dx*dx + dy*dy + dz*dz + eps2
+                    f = Gm[j] * r2 ** -1.5
+                    ax += f * dx
+                    ay += f * dy
+                    az += f * dz
+                tile_acc[i - i0, 0] += ax
+                tile_acc[i - i0, 1] += ay
+                tile_acc[i - i0, 2] += az
+        for i in range(i0, i1):
+            out[i, 0] = tile_acc[i - i0, 0]
+            out[i, 1] = tile_acc[i - i0, 1]
+            out[i, 2] = tile_acc[i - i0, 2]
+    return out
+
+@njit(cache=True, fastmath=True)
+def _verlet_step(pos, vel, acc, Gm, dt, eps2):
+    """
+    融合的速度Verlet单步内核（半步踢-漂移-半步踢），全部原地更新
+    与 x += v·dt + a·dt²/2, v += (a_old + a_new)·dt/2 在数学上等价
+    acc 输入为当前加速度，返回时为新位置处的加速度；Gm 为 G·m 数组
+    """
+    n = pos.shape[0]
+    half_dt = 0.5 * dt
+    for i in range(n):
+        for k in range(3):
+            vel[i, k] += half_dt * acc[i, k]
+            pos[i, k] += dt * vel[i, k]
+    
+    _grav_acc(pos, Gm, eps2, acc)
+    
+    for i in range(n):
+        for k in range(3):
+            vel[i, k] += half_dt * acc[i, k]
 
-def calculate_gravitational_acceleration(positions, masses):
-    """计算万有引力产生的加速度"""
+@njit(cache=True, fastmath=True)
+def _verlet_step_3body(pos, vel, acc, Gm, dt, eps2):
+    """
+    三体系统专用的速度Verlet单步内核，循环全部展开
+    参数与 _verlet_step 相同，只适用于 N = 3
+    """
+    half_dt = 0.5 * dt
+    
+    # 半步踢 + 漂移
+    for k in range(3):
+        vel[0, k] += half_dt * acc[0, k]
+        vel[1, k] += half_dt * acc[1, k]
+        vel[2, k] += half_dt * acc[2, k]
+        pos[0, k] += dt * vel[0, k]
+        pos[1, k] += dt * vel[1, k]
+        pos[2, k] += dt * vel[2, k]
+    
+    # 三对相对位置 r_ij = r_j - r_i
+    x01 = pos[1, 0] - pos[0, 0]
+    y01 = pos[1, 1] - pos[0, 1]
+    z01 = pos[1, 2] - pos[0, 2]
+    x02 = pos[2, 0] - pos[0, 0]
+    y02 = pos[2, 1] - pos[0, 1]
+    z02 = pos[2, 2] - pos[0, 2]
+    x12 = pos[2, 0] - pos[1, 0]
+    y12 = pos[2, 1] - pos[1, 1]
+    z12 = pos[2, 2] - pos[1, 2]
+    
+    inv_r3_01 = (x01*x01 + y01*y01 + z01*z01 + eps2) ** -1.5
+    inv_r3_02 = (x02*x02 + y02*y02 + z02*z02 + eps2) ** -1.5
+    inv_r3_12 = (x12*x12 + y12*y12 + z12*z12 + eps2) ** -1.5
+    
+    # 新加速度
+    acc[0, 0] = Gm[1] * inv_r3_01 * x01 + Gm[2] * inv_r3_02 * x02
+    acc[0, 1] = Gm[1] * inv_r3_01 * y01 + Gm[2] * inv_r3_02 * y02
+    acc[0, 2] = Gm[1] * inv_r3_01 * z01 + Gm[2] * inv_r3_02 * z02
+    acc[1, 0] = -Gm[0] * inv_r3_01 * x01 + Gm[2] * inv_r3_12 * x12
+    acc[1, 1] = -Gm[0] * inv_r3_01 * y01 + Gm[2] * inv_r3_12 * y12
+    acc[1, 2] = -Gm[0] * inv_r3_01 * z01 + Gm[2] * inv_r3_12 * z12
+    acc[2, 0] = -Gm[0] * inv_r3_02 * x02 - Gm[1] * inv_r3_12 * x12
+    acc[2, 1] = -Gm[0] * inv_r3_02 * y02 - Gm[1] * inv_r3_12 * y12
+    acc[2, 2] = -Gm[0] * inv_r3_02 * z02 - Gm[1] * inv_r3_12 * z12
+    
+    # 半步踢
+    for k in range(3):
+        vel[0, k] += half_dt * acc[0, k]
+        vel[1, k] += half_dt * acc[1, k]
+        vel[2, k] += half_dt * acc[2, k]
+
+def _grav_acc_pdist(positions, Gm, eps2):
+    """
+    基于 scipy pdist 的万有引力加速度（无numba时用于较大的N）
+    两两距离由C实现的 pdist 计算；只对上三角的每一对天体计算一次 r_j - r_i，
+    再按牛顿第三定律分别累加到 i 和 j，临时数组为 (N(N-1)/2, 3)
+    """
+    from scipy.spatial.distance import pdist
+    
     n_bodies = len(positions)
-    acc = np.zeros_like(positions)
+    i, j = np.triu_indices(n_bodies, k=1)  # 与 pdist 输出的天体对顺序一致
+    diff = positions[j] - positions[i]
+    r = pdist(positions)
+    inv_r3 = (r * r + eps2) ** -1.5
+    
+    w_i = Gm[j] * inv_r3  # j 对 i 的作用
+    w_j = Gm[i] * inv_r3  # i 对 j 的作用
+    acc = np.empty_like(positions)
+    for k in range(3):
+        acc[:, k] = (np.bincount(i, w_i * diff[:, k], minlength=n_bodies)
+                     - np.bincount(j, w_j * diff[:, k], minlength=n_bodies))
+    return acc
+
+def calculate_gravitational_acceleration(positions, masses, eps2=0.0, out=None, block_size=8):
+    """
+    计算万有引力产生的加速度
+    positions: 位置数组，形状 (N, 3) (m)
+    masses: 质量数组，形状 (N,) (kg)
+    eps2: 软化长度的平方 (m²)，默认为0即精确牛顿引力
+    out: 可选的预分配输出数组 (N, 3)，用于避免每步分配内存
+    block_size: 分块内核每块的天体数（N >= TILED_MIN_BODIES 时生效）
+    安装numba时使用JIT内核，否则使用NumPy广播向量化实现（N较大时基于pdist）
+    """
+    positions = np.asarray(positions, dtype=float)
+    Gm = G * np.asarray(masses, dtype=float)
+    
+    if NUMBA_AVAILABLE:
+        if out is None:
+            out = np.empty_like(positions)
+        if len(positions) >= TILED_MIN_BODIES:
+            return _grav_acc_tiled(positions, Gm, eps2, out, block_size)
+        return _grav_acc(positions, Gm, eps2, out)
+    
+    if len(positions) >= PDIST_MIN_BODIES:
+        acc = _grav_acc_pdist(positions, Gm, eps2)
+        if out is not None:
+            out[...] = acc
+            return out
+        return acc
     
-    for i in range(n_bodies):
-        for j in range(n_bodies):
-            if i != j:
-                r_ij = positions[j] - positions[i]
-                r_ij_norm = np.linalg.norm(r_ij)
-                acc[i] += G * masses[j] * r_ij / (r_ij_norm ** 3)
+    # diff[i, j] = r_j - r_i
+    diff = positions[None, :, :] - positions[:, None, :]
+    r2 = (diff * diff).sum(-1) + eps2
+    np.fill_diagonal(r2, np.inf)  # 排除自相互作用，对角线 inv_r3 为0
+    inv_r3 = r2 ** -1.5
     
+    acc = (inv_r3[:, :, None] * diff * Gm[None, :, None]).sum(1)
+    if out is not None:
+        out[...] = acc
+        return out
     return acc
 
 def setup_solar_system_initial_conditions(perturbation=0.0):
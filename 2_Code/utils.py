@@ -1,5 +1,6 @@
 import os
 import time
+from functools import wraps
 
 def create_results_directory():
     """创建结果保存目录"""
@@ -8,7 +9,8 @@ def create_results_directory():
     os.chdir('results')
 
 def timer_decorator(func):
-    """计时装饰器"""
+    """计时装饰器（保留原函数名，使被装饰函数可被多进程序列化）"""
+    @wraps(func)
     def wrapper(*args, **kwargs):
         start_time = time.time()
         result = func(*args, **kwargs)
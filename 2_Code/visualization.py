@@ -1,18 +1,20 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-from mpl_toolkits.mplot3d import Axes3D
 import os
+from constants import AU
 
 def plot_orbits(trajectories, title="三体系统轨道", save_path=None):
     """绘制3D轨道图"""
+    import matplotlib.pyplot as plt
+    
     fig = plt.figure(figsize=(10, 8))
     ax = fig.add_subplot(111, projection='3d')
     
-    # 提取轨迹数据
-    sun_traj = np.array([traj[0] for traj in trajectories]) / 1.496e11  # 转换为AU
-    earth_traj = np.array([traj[1] for traj in trajectories]) / 1.496e11
-    moon_traj = np.array([traj[2] for traj in trajectories]) / 1.496e11
+    # 提取轨迹数据（trajectories 形状为 (T, N, 3)），整体转换为AU后按天体切片
+    # 以AU为单位后单精度足够绘图使用，可减半传给matplotlib的数据量
+    traj_AU = (np.asarray(trajectories) / AU).astype(np.float32)
+    sun_traj = traj_AU[:, 0]
+    earth_traj = traj_AU[:, 1]
+    moon_traj = traj_AU[:, 2]
     
     # 绘制轨道
     ax.plot(sun_traj[:, 0], sun_traj[:, 1], sun_traj[:, 2], 'yo-', label='太阳')
@@ -32,9 +34,14 @@ def plot_orbits(trajectories, title="三体系统轨道", save_path=None):
     else:
         plt.show()
 
-def plot_energy_conservation(energies, initial_energy, title="能量守恒", save_path=None):
-    """绘制能量守恒图"""
-    time = np.arange(len(energies)) * 12 * 3600 / 86400  # 转换为天
+def plot_energy_conservation(energies, initial_energy, title="能量守恒", save_path=None, times=None):
+    """绘制能量守恒图，times 为各能量采样点的时间 (天)，缺省时按每12小时一个采样点计算"""
+    import matplotlib.pyplot as plt
+    
+    if times is None:
+        time = np.arange(len(energies)) * 12 * 3600 / 86400  # 转换为天
+    else:
+        time = np.asarray(times)
     energy_ratio = np.array(energies) / initial_energy
     
     plt.figure(figsize=(10, 6))
@@ -53,10 +60,12 @@ def plot_energy_conservation(energies, initial_energy, title="能量守恒", sav
 
 def plot_orbit_elements(orbit_data, title="轨道要素演化", save_path=None):
     """绘制轨道要素演化图"""
+    import matplotlib.pyplot as plt
+    
     time = np.array([data['time'] for data in orbit_data])
     
     # 地球半长轴 (AU)
-    earth_a = np.array([data['earth']['semi_major_axis'] / 1.496e11 for data in orbit_data])
+    earth_a = np.array([data['earth']['semi_major_axis'] / AU for data in orbit_data])
     # 地球偏心率
     earth_e = np.array([data['earth']['eccentricity'] for data in orbit_data])
     
@@ -84,22 +93,27 @@ def plot_orbit_elements(orbit_data, title="轨道要素演化", save_path=None):
 def generate_animation(trajectories, title="三体系统轨道演化", filename="animation.gif", show_progress=True):
     """生成三体运动动画"""
     import time
+    import matplotlib.pyplot as plt
+    from matplotlib.animation import FuncAnimation, FFMpegWriter, PillowWriter
     start_time = time.time()
     
     fig = plt.figure(figsize=(10, 8))
     ax = fig.add_subplot(111, projection='3d')
     
     # 提取轨迹数据
+    trajectories = np.asarray(trajectories)
     skip = max(1, len(trajectories) // 200)  # 最多200帧
-    sun_traj = np.array([traj[0] for traj in trajectories[::skip]]) / 1.496e11
-    earth_traj = np.array([traj[1] for traj in trajectories[::skip]]) / 1.496e11
-    moon_traj = np.array([traj[2] for traj in trajectories[::skip]]) / 1.496e11
+    traj_AU = (trajectories[::skip] / AU).astype(np.float32)
+    sun_traj = traj_AU[:, 0]
+    earth_traj = traj_AU[:, 1]
+    moon_traj = traj_AU[:, 2]
     time_steps = len(sun_traj)
     
     # 绘制初始帧
     sun, = ax.plot([sun_traj[0, 0]], [sun_traj[0, 1]], [sun_traj[0, 2]], 'yo', markersize=10, label='太阳')
     earth, = ax.plot([earth_traj[0, 0]], [earth_traj[0, 1]], [earth_traj[0, 2]], 'bo', markersize=6, label='地球')
     moon, = ax.plot([moon_traj[0, 0]], [moon_traj[0, 1]], [moon_traj[0, 2]], 'go', markersize=4, label='月球')
+    # 完整轨道只绘制一次作为静态背景，动画中只更新天体标记
     earth_orbit, = ax.plot(earth_traj[:, 0], earth_traj[:, 1], earth_traj[:, 2], 'b-', alpha=0.3)
     moon_orbit, = ax.plot(moon_traj[:, 0], moon_traj[:, 1], moon_traj[:, 2], 'g-', alpha=0.3)
     
@@ -125,36 +139,45 @@ def generate_animation(trajectories, title="三体系统轨道演化", filename=
     
     # 动画更新函数
     def update(frame):
-        if show_progress and frame % 10 == 0:
-            print(f"生成动画帧 {frame}/{time_steps}")
-        
         sun.set_data([sun_traj[frame, 0]], [sun_traj[frame, 1]])
         sun.set_3d_properties([sun_traj[frame, 2]])
         earth.set_data([earth_traj[frame, 0]], [earth_traj[frame, 1]])
         earth.set_3d_properties([earth_traj[frame, 2]])
         moon.set_data([moon_traj[frame, 0]], [moon_traj[frame, 1]])
         moon.set_3d_properties([moon_traj[frame, 2]])
-        earth_orbit.set_data(earth_traj[:frame+1, 0], earth_traj[:frame+1, 1])
-        earth_orbit.set_3d_properties(earth_traj[:frame+1, 2])
-        moon_orbit.set_data(moon_traj[:frame+1, 0], moon_traj[:frame+1, 1])
-        moon_orbit.set_3d_properties(moon_traj[:frame+1, 2])
         ax.set_title(f"{title} (时间: {frame*skip*12/24:.1f}天)")
-        return sun, earth, moon, earth_orbit, moon_orbit
+        return sun, earth, moon
     
     # 生成动画
+    if show_progress:
+        print(f"生成动画 ({time_steps} 帧)...")
     anim = FuncAnimation(fig, update, frames=time_steps, interval=50, blit=True)
     
-    # 保存动画
-    if not filename.lower().endswith('.gif'):
-        filename = os.path.splitext(filename)[0] + '.gif'
-    
-    try:
-        anim.save(filename, writer='pillow', fps=20, dpi=100)
-        if show_progress:
-            print(f"动画已保存至 {filename}")
-    except Exception as e:
-        print(f"保存动画失败: {e}")
-        print("请确保已安装Pillow库 (pip install pillow)")
+    # 保存动画：ffmpeg可用时用libx264编码为MP4（远快于Pillow逐帧量化GIF），
+    # ffmpeg不可用或保存失败（如缺少libx264）时退回Pillow生成GIF
+    base = os.path.splitext(filename)[0]
+    saved = False
+    if FFMpegWriter.isAvailable():
+        filename = base + '.mp4'
+        try:
+            anim.save(filename, writer=FFMpegWriter(fps=20, codec='libx264', bitrate=2000), dpi=100)
+            saved = True
+        except Exception as e:
+            print(f"ffmpeg保存动画失败: {e}，改用Pillow生成GIF")
+            if os.path.exists(filename):
+                os.remove(filename)
+    
+    if not saved:
+        filename = base + '.gif'
+        try:
+            anim.save(filename, writer=PillowWriter(fps=20), dpi=100)
+            saved = True
+        except Exception as e:
+            print(f"保存动画失败: {e}")
+            print("请确保已安装Pillow库 (pip install pillow)")
+    
+    if saved and show_progress:
+        print(f"动画已保存至 {filename}")
     
     plt.close()
     return filename